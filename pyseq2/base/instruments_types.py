@@ -71,4 +71,14 @@ SEPARATOR = dict(
         fpga=b"\r\n",
     )
 
+# Maps both a command and its response to the same key so that responses can be routed
+# to their pending command without trying every parser. Instruments without an entry
+# fall back to trying each pending parser in FIFO order.
+DISPATCH_KEY = cast(
+    dict[SerialInstruments, Callable[[str], str]],
+    dict(
+        fpga=λ_str(lambda x: x.rsplit("\n", 1)[-1].split(" ", 1)[0]),  # Echo of the command name.
+    ),
+)
+
 # fmt: on
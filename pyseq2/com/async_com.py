@@ -1,25 +1,100 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
 import re
+import threading
 import time
 from asyncio import CancelledError, Future, StreamReader, StreamWriter
-from dataclasses import dataclass
-from logging import getLogger
-from typing import Annotated, Any, Callable, Generic, NamedTuple, NoReturn, ParamSpec, TypeVar, overload
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import partial
+from logging import DEBUG, getLogger
+from typing import (
+    Annotated,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Generic,
+    Iterator,
+    NamedTuple,
+    NoReturn,
+    ParamSpec,
+    TypeVar,
+    overload,
+)
 
 from serial_asyncio import open_serial_connection
 
-from pyseq2.base.instruments_types import COLOR, FORMATTER, SEPARATOR, SerialInstruments
+from pyseq2.base.instruments_types import COLOR, DISPATCH_KEY, FORMATTER, SEPARATOR, SerialInstruments
+from pyseq2.com.io_thread import IO_THREAD, run_on
+from pyseq2.com.latency import LATENCY, Timing
+from pyseq2.com.recorder import RECORDER, Direction
+from pyseq2.com.spacing import SpacingProfile
+from pyseq2.config import CONFIG
 from pyseq2.fakes.fake_serial import FakeOptions, open_fake
 from pyseq2.utils.utils import IS_FAKE, InvalidResponse
 
 logger = getLogger(__name__)
 # © is not in ASCII. Looking at you Schneider Electrics (x-stage).
 ENCODING_KW = {"encoding": "ISO-8859-1", "errors": "strict"}
+STRIP = b" \x03\r\n\xff"
 
 T = TypeVar("T", covariant=True)
 P = ParamSpec("P")
+Parser = Callable[[str], Any]
+
+
+class Priority(IntEnum):
+    """Lanes for `COM.send`. Queued commands are sent lowest value first, FIFO within a lane.
+    Everything that changes the state of an instrument shares one lane so that their order is kept.
+    """
+
+    CONTROL = 0
+    STATUS = 1  # Read-only queries. Yield to queued control commands.
+
+
+class PriorityLock:
+    """Mutex that is handed over to the waiter with the highest priority, then the earliest arrival."""
+
+    def __init__(self) -> None:
+        self._locked = False
+        self._waiters: list[tuple[Priority, int, Future[None]]] = []
+        self._counter = itertools.count()
+
+    def locked(self) -> bool:
+        return self._locked
+
+    async def acquire(self, priority: Priority = Priority.CONTROL) -> None:
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+
+        fut: Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), fut))
+        try:
+            await fut
+        except CancelledError:
+            if fut.done() and not fut.cancelled():  # Lock was handed over just before the cancel.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            if not (fut := heapq.heappop(self._waiters)[2]).done():
+                fut.set_result(None)  # Ownership passes on, stays locked.
+                return
+        self._locked = False
+
+    @asynccontextmanager
+    async def __call__(self, priority: Priority = Priority.CONTROL) -> AsyncGenerator[None, None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
 
 
 class Channel(NamedTuple):
@@ -38,6 +113,9 @@ class CmdParse(Generic[P, T]):
         cmd: String command or a unary function that outputs a command.
         parser: A unary function that takes in raw output from the device and parse it into a useful format.
         n_lines: Number of lines in the expected response.
+        priority: Lane in the send queue. Read-only queries should be `Priority.STATUS`.
+        ttl: Read-only queries only. Seconds for which a result is reused.
+            Identical queries in flight at the same time share one response.
 
     Returns:
         A data structure in which a command and its parsing function are together.
@@ -48,8 +126,16 @@ class CmdParse(Generic[P, T]):
     delayed_parser: Callable[[str], T] | None = None
     n_lines: int = 1
     timeout: float | None = 5
+    template: str | None = field(default=None, compare=False)
+    priority: Priority = Priority.CONTROL
+    ttl: float | None = None
     # If you're adding some new variables don't forget to add them to __call__.
 
+    def __set_name__(self, owner: type, name: str) -> None:
+        # Name the command after its attribute, e.g. `TiltCmd.SET_POS`.
+        if self.template is None:
+            object.__setattr__(self, "template", f"{owner.__name__}.{name}")
+
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> CmdParse[P, T]:
         if isinstance(self.cmd, str):
             raise TypeError("This command does not take argument(s).")
@@ -59,8 +145,16 @@ class CmdParse(Generic[P, T]):
             delayed_parser=self.delayed_parser,
             n_lines=self.n_lines,
             timeout=self.timeout,
+            template=self.template or getattr(self.cmd, "__qualname__", None),
+            priority=self.priority,
+            ttl=self.ttl,
         )
 
+    @property
+    def key(self) -> str:
+        """Command before argument substitution. Used to group commands for statistics."""
+        return self.template or str(self.cmd)
+
     def __str__(self) -> str:
         return str(self.cmd)
 
@@ -68,7 +162,8 @@ class CmdParse(Generic[P, T]):
 class COM:
     """
     Necessary conditions:
-    - Commands are executed in FIFO order.
+    - Commands are executed in FIFO order within each `Priority` lane.
+      Queued status reads are sent after queued control commands.
     - Response from an instrument is in FIFO order.
         **This is usually true except for `move` commands in which the instrument is
           programmed to respond on completion**
@@ -84,19 +179,22 @@ class COM:
             Only the FPGA uses separate channels.
         min_spacing (int, optional): Minimum time between commands. Defaults to 0.05s.
         no_check (bool, optional): Do not check for return values. Defaults to False.
+        io_thread (bool, optional): Run on the I/O thread. Defaults to `CONFIG.ioThread`.
+        spacing (SpacingProfile, optional): Calibrated spacings that replace `min_spacing`.
+            Defaults to the profile saved by `scripts/calibrate_spacing.py`, if any.
     """
 
     FIRST_LINES = re.compile(
-        "|".join(
+        b"|".join(
             [
-                r"@LOG The FPGA is now online.  Enjoy!",
-                r"\??PR MV",
-                r"\??PR P",
-                r">EX 1",
-                r"1R\([A-Z]{2}\)",
-                r"1Z.*",
-                r"@LOG Trigger Camera",
-                r"@TILTPOS[123] \-?\d+",
+                rb"@LOG The FPGA is now online.  Enjoy!",
+                rb"\??PR MV",
+                rb"\??PR P",
+                rb">EX 1",
+                rb"1R\([A-Z]{2}\)",
+                rb"1Z.*",
+                rb"@LOG Trigger Camera",
+                rb"@TILTPOS[123] \-?\d+",
             ]
         )
     )
@@ -111,11 +209,33 @@ class COM:
         min_spacing: Annotated[float, "s"] = 0.01,
         no_check: bool = False,
         test_params: FakeOptions | None = None,
+        io_thread: bool | None = None,
+        spacing: SpacingProfile | None = None,
     ):
+        if io_thread is None:
+            io_thread = CONFIG.ioThread
+        if io_thread and threading.current_thread() is not IO_THREAD.thread:
+            return await IO_THREAD.run(
+                cls.ainit(
+                    name,
+                    port_tx,
+                    port_rx,
+                    min_spacing=min_spacing,
+                    no_check=no_check,
+                    test_params=test_params,
+                    io_thread=True,
+                    spacing=spacing,
+                )
+            )
+
         baudrate = 115200 if name in ("fpga", "arm9chem", "arm9pe") else 9600
         if test_params is None:
             test_params = FakeOptions()
+        if (calibrated := (spacing or SpacingProfile.load()).instruments.get(name)) is not None:
+            min_spacing = calibrated.default if calibrated.default is not None else min_spacing
         self = cls(name, test_params, min_spacing, no_check)
+        if calibrated is not None:
+            self.spacing.update(calibrated.commands)
 
         Streams = tuple[StreamReader, StreamWriter]
         if not IS_FAKE():  # Real instrument
@@ -146,65 +266,118 @@ class COM:
         no_check: bool = False,
     ) -> None:
 
+        self.instrument = name
         self.name = f"[{COLOR[name]}]{name:10s}[/{COLOR[name]}]"
         self.formatter = FORMATTER[name]
         self.sep = SEPARATOR.get(name, b"\n")
+        self.dispatch_key = DISPATCH_KEY.get(name)
         self.no_check = no_check
         self.test_params = test_params
 
+        # Everything below belongs to the loop of this thread. Calls from other threads are forwarded.
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.current_thread()
+
         self.min_spacing = min_spacing
+        self.spacing: dict[str, float] = {}  # Per `CmdParse.key`, overrides `min_spacing`.
         self.t_lastcmd = time.monotonic()
         self.big_lock = asyncio.Lock()
 
-        self._lock = asyncio.Lock()
+        self._lock = PriorityLock()
         self._serial: Channel
 
-        self._waiting: list[tuple[Callable[[str], Any], Future[Any]]] = list()
+        # Insertion-ordered. Each pending parser has its own future, which is also the handle for removal.
+        self._waiting: dict[Future[Any], tuple[Parser, str | None]] = dict()
+        self._index: dict[str, dict[Future[Any], Parser]] = dict()
+        self._timings: dict[Future[Any], Timing] = dict()  # Only used when LATENCY is enabled.
+        self._idle = asyncio.Event()  # Set whenever nothing is pending.
+        self._idle.set()
+        # Results of commands with a `ttl`, keyed by command. Cleared by any other command that is not a status read.
+        self._cache: dict[str, tuple[float, Any]] = dict()
+        self._inflight: dict[str, Future[Any]] = dict()
+
+    def _register(self, parser: Parser, fut: Future[Any], key: str | None) -> None:
+        self._waiting[fut] = (parser, key)
+        self._idle.clear()
+        if key is not None:
+            self._index.setdefault(key, {})[fut] = parser
+
+    def _pop(self, fut: Future[Any]) -> None:
+        entry = self._waiting.pop(fut, None)
+        if not self._waiting:
+            self._idle.set()
+        if entry is None or (key := entry[1]) is None:
+            return
+        bucket = self._index[key]
+        del bucket[fut]
+        if not bucket:
+            del self._index[key]
+
+    def _candidates(self, resp: str) -> Iterator[tuple[Future[Any], Parser]]:
+        """Pending parsers in the order they should be tried against `resp`.
+        Those registered under the same dispatch key as `resp` come first.
+        Everything else follows in FIFO order in case the key does not tell the whole story.
+        """
+        bucket = self._index.get(self.dispatch_key(resp)) if self.dispatch_key is not None else None
+        if not bucket:
+            yield from ((fut, parser) for fut, (parser, _) in self._waiting.items())
+            return
+
+        yield from bucket.items()
+        yield from ((fut, parser) for fut, (parser, _) in self._waiting.items() if fut not in bucket)
+
+    def _match(self, resp: str) -> tuple[Future[Any], Any] | None:
+        for fut, parser in self._candidates(resp):
+            try:
+                return fut, parser(resp)
+            except InvalidResponse:
+                ...
+        return None
+
+    def _log_line(self, raw: bytes) -> str:
+        return f"{self.name}[cyan]Raw: {str(raw)[2:-1]:20s}"
 
     async def _read_forever(self) -> NoReturn:
-        buffer, rbuffer = "", b""
+        # Reused for every response. Stripped lines so far joined by b"\n", and the lines as received.
+        # Only decoded when a parser is waiting.
+        buffer, rbuffer = bytearray(), bytearray()
+        t_first = 0.0
         while True:
             try:
-                resp = (
-                    (raw := await self._serial.reader.readuntil(self.sep))
-                    .strip(b" \x03\r\n\xff")
-                    .decode(**ENCODING_KW)
-                )
-
-                log_line = f"{self.name}[cyan]Raw: {str(raw)[2:-1]:20s}"
+                raw = await self._serial.reader.readuntil(self.sep)
+                if RECORDER.active:
+                    RECORDER.record(self.instrument, Direction.RX, raw)
 
-                if not resp:
+                if not (resp := raw.strip(STRIP)):
                     continue
 
                 if self.no_check:
-                    logger.debug(log_line)
+                    if logger.isEnabledFor(DEBUG):
+                        logger.debug(self._log_line(raw))
                     continue
 
                 if buffer:
-                    buffer += "\n" + resp
-                    rbuffer += raw
+                    buffer += b"\n"
                 else:
-                    buffer, rbuffer = resp, raw
-
-                del resp
-
-                for i in range(len(self._waiting)):
-                    parser, fut = self._waiting[i]
-                    try:
-                        parsed = parser(buffer)
-                    except InvalidResponse:
-                        ...
-                    else:
-                        logger.debug(f"{log_line}[green]Parsed: '{parsed}'")
-                        fut.set_result(parsed)
-                        del self._waiting[i]
-                        buffer, rbuffer = "", b""
-                        break
-                else:
-                    if not self.FIRST_LINES.search(buffer):
-                        temp = rbuffer
-                        buffer, rbuffer = "", b""
-                        raise InvalidResponse(f"{temp}")
+                    t_first = time.monotonic()
+                buffer += resp
+                rbuffer += raw
+
+                if self._waiting and (matched := self._match(buffer.decode(**ENCODING_KW))) is not None:
+                    fut, parsed = matched
+                    if logger.isEnabledFor(DEBUG):
+                        logger.debug(f"{self._log_line(raw)}[green]Parsed: '{parsed}'")
+                    self._pop(fut)
+                    if (tm := self._timings.pop(fut, None)) is not None and tm.t_first is None:
+                        tm.t_first = t_first
+                    buffer.clear()
+                    rbuffer.clear()
+                    fut.set_result(parsed)
+                elif not self.FIRST_LINES.search(buffer):
+                    temp = bytes(rbuffer)
+                    buffer.clear()
+                    rbuffer.clear()
+                    raise InvalidResponse(f"{temp}")
 
             except (CancelledError, RuntimeError) as e:
                 raise e
@@ -233,55 +406,122 @@ class COM:
         Returns:
             None for msg, Future of a CmdParse result.
         """
+        if threading.current_thread() is not self._thread:
+            return await run_on(self._loop, self.send(cmd))
 
+        tm = Timing(time.monotonic()) if LATENCY.enabled else None
         if isinstance(cmd, str):
+            self.invalidate()
             await self._send(self.formatter(cmd).encode(**ENCODING_KW))
+            if tm is not None:
+                LATENCY.record(self.instrument, cmd, "write", time.monotonic() - tm.t_send)
             return None
 
         if not isinstance(cmd.cmd, str):
             raise ValueError("This command needs argument(s), call it first.")
 
+        if cmd.ttl is not None:
+            return await self._cached(cmd, tm)
+        if cmd.priority == Priority.STATUS:
+            return await self._request(cmd, tm)
+
+        # Anything cached before or during a write could be stale.
+        self.invalidate()
+        try:
+            return await self._request(cmd, tm)
+        finally:
+            self.invalidate()
+
+    async def _request(self, cmd: CmdParse[Any, T], tm: Timing | None) -> T:
+        assert isinstance(cmd.cmd, str)
         fut: Future[T] = asyncio.Future()
+        fut_: Future[Any] = asyncio.Future() if cmd.delayed_parser is not None else fut  # type: ignore
 
         # Need lock as reversal can happen when two closely spaced commands enter.
         # While the former is waiting for min_spacing, the later could arrive just a
         # little later to pass the min_spacing check without waiting.
-        async with self._lock:
+        key = self.dispatch_key(cmd.cmd) if self.dispatch_key is not None else None
+        async with self._lock(cmd.priority):
             if cmd.delayed_parser is not None:
-                self._waiting.append((cmd.delayed_parser, fut))
+                self._register(cmd.delayed_parser, fut, key)
 
             if cmd.parser is not None:
-                fut_ = asyncio.Future() if cmd.delayed_parser is not None else fut  # type: ignore
-                self._waiting.append((cmd.parser, fut_))  # type: ignore  # Dump future
+                self._register(cmd.parser, fut_, key)  # Dump future
 
-            await self._send(self.formatter(cmd.cmd).encode(**ENCODING_KW))
+            await self._send(self.formatter(cmd.cmd).encode(**ENCODING_KW), self.spacing.get(cmd.key))
+            if tm is not None:
+                tm.t_write = self.t_lastcmd
+                self._timings[fut] = self._timings[fut_] = tm
 
-        return await (asyncio.wait_for(self.catchable_future(fut, cmd), cmd.timeout) if cmd.timeout else fut)
+        res = asyncio.wait_for(self.catchable_future(fut, cmd), cmd.timeout) if cmd.timeout else fut
+        if tm is None:
+            return await res
+
+        try:
+            out = await res
+        finally:
+            self._timings.pop(fut, None)
+            self._timings.pop(fut_, None)
+        LATENCY.record_timing(self.instrument, cmd.key, tm, time.monotonic())
+        return out
+
+    async def _cached(self, cmd: CmdParse[Any, T], tm: Timing | None) -> T:
+        """Returns a result younger than `cmd.ttl` if there is one.
+        Otherwise, joins the identical query in flight or sends a new one.
+        """
+        assert isinstance(cmd.cmd, str) and cmd.ttl is not None
+        if (hit := self._cache.get(cmd.cmd)) is not None and time.monotonic() - hit[0] < cmd.ttl:
+            return hit[1]
+
+        if (flight := self._inflight.get(cmd.cmd)) is None:
+            flight = self._inflight[cmd.cmd] = asyncio.ensure_future(self._request(cmd, tm))
+            flight.add_done_callback(partial(self._land, cmd.cmd))
+        # Shielded so that a cancelled caller does not cancel the query for everyone else.
+        return await asyncio.shield(flight)
+
+    def _land(self, key: str, flight: Future[Any]) -> None:
+        if self._inflight.get(key) is not flight:  # Invalidated while in flight.
+            return
+        del self._inflight[key]
+        if not flight.cancelled() and flight.exception() is None:
+            self._cache[key] = (time.monotonic(), flight.result())
+
+    def invalidate(self) -> None:
+        """Drops cached results. Queries already in flight still resolve for their callers but are not cached."""
+        if threading.current_thread() is not self._thread:
+            self._loop.call_soon_threadsafe(self.invalidate)  # Runs before anything sent after this call.
+            return
+        self._cache.clear()
+        self._inflight.clear()
 
     async def catchable_future(self, fut: asyncio.Future[T], cmd: CmdParse[Any, T]) -> T:
         try:
             return await fut
         except (asyncio.CancelledError, RuntimeError) as e:
-            for w in self._waiting:
-                if w[1] is fut:
-                    self._waiting.remove(w)
-                    break
+            self._pop(fut)
             logger.error(f"{self.name} timeout after {cmd.timeout} s from {cmd.cmd}.")
             raise e
 
-    async def _send(self, msg: bytes) -> None:
+    async def _send(self, msg: bytes, spacing: Annotated[float, "s"] | None = None) -> None:
         """This needs to be synchronous to maintain order of execution.
         asyncio.Queue is not thread-safe and using an asynchronous function to queue things does not guarantee order.
         Enforces minimum delay between commands.
         Args:
             msg (bytes): Raw bytes to be sent. Usually encoded in ISO-8859-1.
+            spacing (float, optional): Minimum time since the last command. Defaults to `min_spacing`.
         """
-        if self.min_spacing:
-            await asyncio.sleep(max(0, self.min_spacing - (time.monotonic() - self.t_lastcmd)))
+        if spacing is None:
+            spacing = self.min_spacing
+        if spacing:
+            await asyncio.sleep(max(0, spacing - (time.monotonic() - self.t_lastcmd)))
         self._serial.writer.write(msg)
         self.t_lastcmd = time.monotonic()
+        if RECORDER.active:
+            RECORDER.record(self.instrument, Direction.TX, msg)
         logger.debug(f"{self.name}[green]Tx:  {str(msg)[2:-1]}")
 
     async def wait(self) -> None:
-        while self._waiting:
-            await asyncio.sleep(0.1)
+        """Returns as soon as no responses are pending."""
+        if threading.current_thread() is not self._thread:
+            return await run_on(self._loop, self.wait())
+        await self._idle.wait()
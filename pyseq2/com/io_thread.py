@@ -0,0 +1,50 @@
+"""Event loop on a dedicated thread for serial I/O.
+
+With `COM.ainit(..., io_thread=True)` or `ioThread: true` in the config, a `COM` and its reader
+live on this loop. Long synchronous work on the main loop then cannot delay reads or `min_spacing`.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from logging import getLogger
+from typing import Any, Coroutine, TypeVar
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def run_on(loop: asyncio.AbstractEventLoop, coro: Coroutine[Any, Any, T]) -> T:
+    """Runs `coro` on `loop` and awaits it from the current loop. Cancellation is propagated."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+class IOThread:
+    """Daemon thread running its own event loop. Started on first use."""
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def thread(self) -> threading.Thread | None:
+        return self._thread
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="pyseq2-io", daemon=True)
+                self._thread.start()
+                self._loop = loop
+                logger.info("Started serial I/O thread.")
+            return self._loop
+
+    async def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        return await run_on(self.loop, coro)
+
+
+IO_THREAD = IOThread()
@@ -0,0 +1,131 @@
+"""Round-trip latency instrumentation for `COM.send`.
+
+Disabled by default. Enable with `LATENCY.enabled = True` and read with `LATENCY.snapshot()`.
+Each (instrument, command template, stage) gets its own fixed-size histogram, so leaving this on
+for a whole run costs a bounded amount of memory regardless of the number of commands sent.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Annotated, Literal
+
+from pydantic import BaseModel
+
+from pyseq2.base.instruments_types import SerialInstruments
+
+Stage = Literal["write", "first_byte", "parse"]
+μs = Annotated[int, "μs"]
+
+
+class HistogramSummary(BaseModel):
+    count: int
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+
+
+class Histogram:
+    """Log-linear (HDR-style) histogram of durations with a bounded relative error.
+
+    Values below 2^SUB_BITS μs are stored exactly. Above that, each power of two
+    is split into 2^(SUB_BITS-1) linear buckets, giving a relative error < 2^-(SUB_BITS-1).
+    Values beyond MAX_US are clamped into the last bucket.
+    """
+
+    SUB_BITS = 7  # < 1.6% error.
+    MAX_US: μs = 100_000_000  # 100 s
+
+    def __init__(self) -> None:
+        self._half = 1 << (self.SUB_BITS - 1)
+        self.counts = [0] * (self._index(self.MAX_US) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _index(self, v: μs) -> int:
+        if (exp := v.bit_length() - self.SUB_BITS) <= 0:
+            return v
+        return (exp + 1) * self._half + (v >> exp) - self._half
+
+    def _lower(self, idx: int) -> μs:
+        """Smallest value that maps to bucket `idx`."""
+        if idx < 2 * self._half:
+            return idx
+        exp, sub = divmod(idx - 2 * self._half, self._half)
+        return (sub + self._half) << (exp + 1)
+
+    def record(self, t: Annotated[float, "s"]) -> None:
+        self.counts[self._index(min(max(int(t * 1e6), 0), self.MAX_US))] += 1
+        self.count += 1
+        self.total += t
+        self.min = min(self.min, t)
+        self.max = max(self.max, t)
+
+    def percentile(self, q: float) -> Annotated[float, "s"]:
+        if not self.count:
+            return 0.0
+        target, seen = q / 100 * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(self._lower(i) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> HistogramSummary:
+        return HistogramSummary(
+            count=self.count,
+            min=self.min if self.count else 0.0,
+            max=self.max,
+            mean=self.total / self.count if self.count else 0.0,
+            p50=self.percentile(50),
+            p90=self.percentile(90),
+            p99=self.percentile(99),
+        )
+
+
+@dataclass
+class Timing:
+    """Timestamps of a single command, all from `time.monotonic`."""
+
+    t_send: float
+    t_write: float = 0.0
+    t_first: float | None = None
+
+
+@dataclass
+class LatencyRecorder:
+    """All durations are measured from the moment `COM.send` is called.
+    - write: command written to the port, including waiting for the lock and `min_spacing`.
+    - first_byte: first line of the response arrived.
+    - parse: response parsed and the command returned.
+    """
+
+    enabled: bool = False
+    _hists: dict[tuple[SerialInstruments, str, Stage], Histogram] = field(default_factory=dict)
+
+    def record(self, instrument: SerialInstruments, template: str, stage: Stage, t: float) -> None:
+        if (h := self._hists.get(key := (instrument, template, stage))) is None:
+            h = self._hists[key] = Histogram()
+        h.record(t)
+
+    def record_timing(self, instrument: SerialInstruments, template: str, tm: Timing, t_done: float) -> None:
+        self.record(instrument, template, "write", tm.t_write - tm.t_send)
+        if tm.t_first is not None:
+            self.record(instrument, template, "first_byte", tm.t_first - tm.t_send)
+        self.record(instrument, template, "parse", t_done - tm.t_send)
+
+    def snapshot(self) -> dict[SerialInstruments, dict[str, dict[Stage, HistogramSummary]]]:
+        out: dict[SerialInstruments, dict[str, dict[Stage, HistogramSummary]]] = {}
+        for (instrument, template, stage), h in self._hists.items():
+            out.setdefault(instrument, {}).setdefault(template, {})[stage] = h.summary()
+        return out
+
+    def reset(self) -> None:
+        self._hists.clear()
+
+
+LATENCY = LatencyRecorder()
@@ -0,0 +1,97 @@
+"""Recorder for raw serial traffic.
+
+Every frame written by `COM._send` (Tx) and every line read by `COM._read_forever` (Rx)
+is appended to a binary log with its `time.monotonic` timestamp.
+Replay with `FakeOptions(replay=path)`, see `pyseq2.fakes.fake_serial.ReplayTransport`.
+
+Format (little-endian):
+    Header: MAGIC, u8 n_instruments, then n × (u8 len, name)
+    Record: f64 t, u8 instrument index, u8 direction, u16 len, payload
+"""
+from __future__ import annotations
+
+import struct
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from io import BufferedWriter
+from logging import getLogger
+from pathlib import Path
+from typing import Generator, Iterator, NamedTuple, get_args
+
+from pyseq2.base.instruments_types import SerialInstruments
+
+logger = getLogger(__name__)
+
+MAGIC = b"PSQ2REC\x01"
+RECORD = struct.Struct("<dBBH")
+INSTRUMENTS: tuple[SerialInstruments, ...] = tuple(
+    name for lit in get_args(SerialInstruments) for name in (get_args(lit) or (lit,))
+)
+
+
+class Direction(IntEnum):
+    TX = 0
+    RX = 1
+
+
+class Frame(NamedTuple):
+    t: float
+    instrument: SerialInstruments
+    direction: Direction
+    data: bytes
+
+
+class TrafficRecorder:
+    def __init__(self) -> None:
+        self._file: BufferedWriter | None = None
+        self._ids = {name: i for i, name in enumerate(INSTRUMENTS)}
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: str | Path) -> None:
+        if self._file is not None:
+            raise RuntimeError("Already recording.")
+        f = open(path, "wb")  # noqa: SIM115
+        f.write(MAGIC + bytes([len(INSTRUMENTS)]))
+        for name in INSTRUMENTS:
+            f.write(bytes([len(name)]) + name.encode())
+        self._file = f
+        logger.info(f"Recording serial traffic to {path}.")
+
+    def stop(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info("Stopped recording serial traffic.")
+
+    @contextmanager
+    def session(self, path: str | Path) -> Generator[None, None, None]:
+        self.start(path)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def record(self, instrument: SerialInstruments, direction: Direction, data: bytes) -> None:
+        if self._file is None:
+            return
+        self._file.write(RECORD.pack(time.monotonic(), self._ids[instrument], direction, len(data)) + data)
+
+
+def read_log(path: str | Path) -> Iterator[Frame]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a serial traffic log.")
+        names: list[SerialInstruments] = []
+        for _ in range(f.read(1)[0]):
+            names.append(f.read(f.read(1)[0]).decode())  # type: ignore
+
+        while len(head := f.read(RECORD.size)) == RECORD.size:
+            t, id_, direction, n = RECORD.unpack(head)
+            yield Frame(t, names[id_], Direction(direction), f.read(n))
+
+
+RECORDER = TrafficRecorder()
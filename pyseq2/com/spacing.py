@@ -0,0 +1,89 @@
+"""Minimum spacing between commands, per instrument and per command.
+
+`calibrate` finds the smallest spacing at which a burst of the same command all get valid responses.
+Results are kept in a `SpacingProfile` at `PROFILE_PATH`, which `COM.ainit` loads.
+Instruments and commands that are not in the profile keep the `min_spacing` given to `COM.ainit`.
+See `scripts/calibrate_spacing.py`.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any, Sequence
+
+from pydantic import BaseModel
+
+from pyseq2.config import PATH
+
+if TYPE_CHECKING:
+    from pyseq2.com.async_com import COM, CmdParse
+
+logger = getLogger(__name__)
+
+PROFILE_PATH = PATH / "spacing.json"
+CANDIDATES: tuple[Annotated[float, "s"], ...] = (0.1, 0.05, 0.02, 0.01, 0.005, 0.002, 0.0)
+
+
+class InstrumentSpacing(BaseModel):
+    default: float | None = None  # For commands without their own entry.
+    commands: dict[str, float] = {}  # Keyed by `CmdParse.key`.
+
+
+class SpacingProfile(BaseModel):
+    instruments: dict[str, InstrumentSpacing] = {}
+
+    @classmethod
+    def load(cls, path: Path = PROFILE_PATH) -> SpacingProfile:
+        return cls.parse_file(path) if path.exists() else cls()
+
+    def save(self, path: Path = PROFILE_PATH) -> None:
+        path.write_text(self.json(indent=2))
+        logger.info(f"Saved spacing profile to {path}.")
+
+
+async def probe(com: COM, cmd: CmdParse[Any, Any], spacing: float, n: int = 20, timeout: float = 2) -> bool:
+    """Sends `n` copies of `cmd` back-to-back at `spacing`. True if every one got a valid response."""
+    cmd = replace(cmd, ttl=None, timeout=timeout)  # Every copy has to reach the instrument.
+    old = com.spacing.get(cmd.key)
+    com.spacing[cmd.key] = spacing
+    try:
+        res = await asyncio.gather(*[com.send(cmd) for _ in range(n)], return_exceptions=True)
+    finally:
+        if old is None:
+            del com.spacing[cmd.key]
+        else:
+            com.spacing[cmd.key] = old
+
+    if not any(isinstance(r, BaseException) for r in res):
+        return True
+    await asyncio.sleep(timeout)  # Let stray responses drain.
+    return False
+
+
+async def calibrate(
+    com: COM,
+    cmds: Sequence[CmdParse[Any, Any]],
+    candidates: Sequence[float] = CANDIDATES,
+    *,
+    n: int = 20,
+) -> InstrumentSpacing:
+    """Walks down `candidates` for each command and keeps the last spacing that passed `probe`.
+    The instrument default becomes the largest of these.
+    Only use commands that are safe to repeat, such as reads or writes of the current setting.
+    """
+    out: dict[str, float] = {}
+    for cmd in cmds:
+        safe: float | None = None
+        for spacing in sorted(candidates, reverse=True):
+            if not await probe(com, cmd, spacing, n):
+                break
+            safe = spacing
+        if safe is None:
+            logger.warning(f"{com.name}{cmd.key} failed at every spacing. Not included.")
+            continue
+        logger.info(f"{com.name}{cmd.key}: {safe * 1000:.0f} ms")
+        out[cmd.key] = safe
+
+    return InstrumentSpacing(default=max(out.values()) if out else None, commands=out)
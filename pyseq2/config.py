@@ -20,6 +20,8 @@ class Config(BaseSettings):
     logPath: str = (PATH / "logs").as_posix()
     logLevel: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
     barrelsPerLane: Literal[1, 2, 4, 8] = 1
+    ioThread: bool = False  # Run all serial ports on a dedicated thread. See `pyseq2.com.io_thread`.
+    scratchPath: str | None = None  # Fast local disk for captures larger than RAM. See `DiskBuffers`.
     ports: tuple[int, ...] = None  # type: ignore
 
     # Hack until https://github.com/samuelcolvin/pydantic/pull/2625 is merged.
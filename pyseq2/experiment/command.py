@@ -230,8 +230,14 @@ class TakeImage(BaseModel, AbstractCommand):
             path.parent.mkdir(parents=True, exist_ok=True)
             [p.touch() for p in paths]
 
-        big_img = np.empty((len(zs), len(channels), 128 * n_bundles, 2048), dtype=np.uint16)
+        # Scans too long for RAM stay on the scratch disk, like in `Imager.take`.
+        shape = (len(zs), len(channels), 128 * n_bundles, 2048)
+        disk = (
+            imager.cams.disk if imager.cams is not None and n_bundles >= imager.MAX_BUNDLES_IN_RAM else None
+        )
         for ix, (p, x) in enumerate(zip(paths, xs)):
+            # New array per x so that pending saves never need a copy.
+            big_img = disk.empty(shape) if disk is not None else np.empty(shape, dtype=np.uint16)
             for iz, z in enumerate(zs):
                 logger.info(f"Imaging [{iz+1}/{len(zs)}z {ix+1}/{len(xs)}x] at {x=} y={y_start} {z=}.")
                 await imager.move(x=x, y=y_start, z_obj=z, z_tilt=self.z_tilt)
@@ -242,9 +248,7 @@ class TakeImage(BaseModel, AbstractCommand):
                 )
                 big_img[iz] = img
             if self.save:
-                save_tasks.append(
-                    asyncio.create_task(imager.save(p, big_img.copy()))
-                )  # TODO state per each stack.
+                save_tasks.append(asyncio.create_task(imager.save(p, big_img)))  # TODO state per each stack.
 
         if q is not None:
             q.put_nowait((n_bundles, len(zs), len(xs)))  # Make it look pleasing at the end.
@@ -19,6 +19,7 @@ class FakeAPI:
         self.fc = 0
         self.ready = 0
         self.tm = 4
+        self.props: dict[int, float] = {}  # Property values written so far, by ID.
 
     def __getitem__(self, name: str) -> Any:
         return getattr(self, name)
@@ -203,6 +204,8 @@ class FakeAPI:
         return True
 
     def dcam_getpropertyvalue(self, h: Handle, iProp: c_int32, pValue: pointer[c_double]) -> bool:
+        if iProp.value in self.props:
+            pValue.contents.value = self.props[iProp.value]
         return True
 
     def dcam_setpropertyvalue(self, h: Handle, iProp: c_int32, fValue: c_double) -> bool:
@@ -215,6 +218,7 @@ class FakeAPI:
         pValue: pointer[c_double],
         option: c_int32 = DCAM_DEFAULT_ARG,
     ) -> bool:
+        self.props[iProp.value] = pValue.contents.value
         return True
 
     def dcam_querypropertyvalue(
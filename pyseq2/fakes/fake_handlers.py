@@ -1,4 +1,14 @@
+"""Fake serial instruments.
+
+`__call__` gives the response to a command with lines separated by `\n`.
+With `FakeOptions(realistic_timing=True)`, `FakeTransport` calls `respond` instead, which also
+gives the delay of each line. Instruments that move override it so that completion lines
+arrive when the real hardware would send them.
+Speeds are taken from the commands sent (velocity, acceleration); the conversion factors are estimates.
+"""
+import math
 import re
+from dataclasses import dataclass
 from typing import Protocol
 
 
@@ -6,8 +16,80 @@ class Fakes(Protocol):
     def __call__(self, s: str) -> str:
         ...
 
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        ...
+
+
+class Fake:
+    t = 0.0  # Time of the latest command. Only updated with realistic timing.
+
+    def __call__(self, s: str) -> str:
+        raise NotImplementedError
+
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        """Response as a list of (delay after the command in s, line)."""
+        self.t = t
+        return [(0.0, line) for line in self(s).split("\n")]
+
+
+@dataclass
+class Axis:
+    """Point-to-point move with a trapezoidal velocity profile.
+    Unit of `velo` and `accel` are units/s and units/s² of `pos`. An infinite `accel` gives a constant velocity.
+    """
+
+    velo: float
+    accel: float = math.inf
+    origin: float = 0
+    target: float = 0
+    t0: float = 0
+    t_end: float = 0
+
+    def travel_time(self, dist: float) -> float:
+        if dist * self.accel >= self.velo**2:  # Reaches top speed.
+            return dist / self.velo + self.velo / self.accel
+        return 2 * math.sqrt(dist / self.accel)
+
+    def at(self, t: float) -> float:
+        if t >= self.t_end:
+            return self.target
+        return self.origin + (self.target - self.origin) * (t - self.t0) / (self.t_end - self.t0)
+
+    def move(self, target: float, t: float) -> float:
+        """Starts a move at `t` from wherever the axis is. Returns the time needed."""
+        self.origin, self.target, self.t0 = self.at(t), target, t
+        self.t_end = t + self.travel_time(abs(target - self.origin))
+        return self.t_end - t
+
+    def remaining(self, t: float) -> float:
+        return max(0.0, self.t_end - t)
+
+
+class FakeX(Fake):
+    HOME = 30000
+
+    def __init__(self) -> None:
+        self.axis = Axis(velo=6144, accel=4000)  # steps/s, steps/s². Same as initialization.
+
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        match s.split(" "):
+            case ["MA", x]:
+                move = self.axis.move(int(x.split(",")[0]), t)
+                return [(0.0, f"MA {x}"), (move, "?!")]
+            case ["EX", "1"]:
+                return [(0.0, ">EX 1"), (self.axis.move(self.HOME, t), ">")]
+            case _:
+                ...
+
+        match s.split("="):
+            case ["VM", v]:
+                self.axis.velo = float(v)
+            case ["A", a]:
+                self.axis.accel = float(a)
+            case _:
+                ...
+        return super().respond(s, t)
 
-class FakeX:
     def __call__(self, s: str) -> str:
         match s.split(" "):
             case ["PR", x]:
@@ -36,11 +118,39 @@ class FakeX:
                 return f">{x}"
 
 
-class FakeY:
+class FakeY(Fake):
+    COUNTS_PER_REV = 1_300_000  # `V` is in rev/s.
+
+    def __init__(self) -> None:
+        self.axis = Axis(velo=1.5 * self.COUNTS_PER_REV)
+        self.target = 0
+
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        match s[1:]:
+            case x if x.startswith("D") and x[1:].lstrip("-").isnumeric():
+                self.target = int(x[1:])
+            case x if x.startswith("V") and x[1:].replace(".", "", 1).isnumeric():
+                self.axis.velo = float(x[1:]) * self.COUNTS_PER_REV
+            case "G":
+                self.axis.move(self.target, t)
+            case "GH":
+                self.axis.move(0, t)
+            case "GOTO(CHKMV)":
+                return [(0.0, "1GOTO(CHKMV)"), (self.axis.remaining(t), "Move Done")]
+            case _:
+                ...
+        return super().respond(s, t)
+
     def __call__(self, s: str) -> str:
         s = s[1:]
         if (r := s.split("("))[0] == "R":
-            return f"1R({r[1]}\n*+0"
+            match r[1]:
+                case "PA)":
+                    return f"1R(PA)\n*{round(self.axis.at(self.t)):+d}"
+                case "MV)":
+                    return f"1R(MV)\n*+{int(self.axis.remaining(self.t) > 0)}"
+                case _:
+                    return f"1R({r[1]}\n*+0"
 
         match s:
             case "Z":
@@ -57,7 +167,7 @@ class FakeY:
                 return "1" + x
 
 
-class FakeLaser:
+class FakeLaser(Fake):
     def __call__(self, s: str) -> str:
         match s:
             case "ON" | "OFF":
@@ -78,7 +188,33 @@ class FakeLaser:
                 return "what?"
 
 
-class FakeFPGA:
+class FakeFPGA(Fake):
+    Z_STEPS_PER_UNIT = 1000 * 262 / 1288471  # `ZSTEP` to steps/s. `ZSTEP` is 1288471 × mm/s.
+    TILT_STEPS_PER_UNIT = 0.2  # `TnVL` to steps/s.
+
+    def __init__(self) -> None:
+        self.z = Axis(velo=5 * 1288471 * self.Z_STEPS_PER_UNIT)
+        self.tilt = {i: Axis(velo=62500 * self.TILT_STEPS_PER_UNIT) for i in "123"}
+
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        match s.split():
+            case ["ZSTEP", v]:
+                self.z.velo = int(v) * self.Z_STEPS_PER_UNIT
+            case ["ZDACW", x]:
+                return [(self.z.move(int(x), t), "ZDACW")]
+            case ["ZMV", x]:
+                return [(0.0, "@LOG Trigger Camera"), (self.z.move(int(x), t), "ZMV")]
+            case [cmd, v] if re.fullmatch(r"T[123]VL", cmd):
+                self.tilt[cmd[1]].velo = int(v) * self.TILT_STEPS_PER_UNIT
+            case [cmd, x] if re.fullmatch(r"T[123]MOVETO", cmd):
+                return [(self.tilt[cmd[1]].move(int(x), t), self(s))]
+            case [cmd] if re.fullmatch(r"T[123]HM", cmd):
+                move = self.tilt[cmd[1]].move(0, t)
+                return [(move, line) for line in self(s).split("\n")]
+            case _:
+                ...
+        return super().respond(s, t)
+
     def __call__(self, s: str) -> str:
         match s.split():
             case ["TDIYEWR", _] as e:
@@ -138,21 +274,42 @@ class FakeFPGA:
                 return "what?"
 
 
-class FakePump:
+class FakePump(Fake):
     def __init__(self) -> None:
         self.pos = 0
+        self.t_done = 0.0
         self.re = re.compile(r"\/1V(\d+)(I|O)A(\d+)R")
 
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        pos, busy = self.pos, t < self.t_done
+        res = super().respond(s, t)  # Status is from before the command.
+        if (match := self.re.match(s)) and not busy:
+            self.t_done = t + abs(int(match.group(3)) - pos) / int(match.group(1))
+        return res
+
     def __call__(self, s: str) -> str:
+        status = "@" if self.t < self.t_done else "`"  # Busy until the plunger stops.
         if s == "/1?":
-            return f"/0`{self.pos}"  # Position
+            return f"/0{status}{self.pos}"  # Position
         if match := self.re.match(s):
             self.pos = int(match.group(3))
-            print(self.pos)
-        return "/0`"
+        return f"/0{status}"
+
+
+class FakeValve(Fake):
+    S_PER_PORT = 0.1  # Rotation time between adjacent ports.
+
+    def __init__(self) -> None:
+        self.pos = 1
+        self.t_done = 0.0
 
+    def respond(self, s: str, t: float) -> list[tuple[float, str]]:
+        if s == "CP":  # No reply until the rotor stops.
+            return [(max(0.0, self.t_done - t), self(s))]
+        if s.startswith("GO") and s[2:].isnumeric():
+            self.t_done = max(t, self.t_done) + self.S_PER_PORT * abs(int(s[2:]) - self.pos)
+        return super().respond(s, t)
 
-class FakeValve:
     def __call__(self, s: str) -> str:
         match s:
             case "*ID*":
@@ -160,16 +317,18 @@ class FakeValve:
             case "ID":
                 return "ID = not used"
             case x if x.startswith("GO"):
+                if x[2:].isnumeric():
+                    self.pos = int(x[2:])
                 return ""
             case "CP":
-                return "Position is  = 1"
+                return f"Position is  = {self.pos}"
             case "NP":
                 return "NP = 10"
             case _:
                 return "what?"
 
 
-class FakeARM9:
+class FakeARM9(Fake):
     def __call__(self, s: str) -> str:
         match s:
             case "?IDN":
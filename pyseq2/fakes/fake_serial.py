@@ -1,11 +1,14 @@
 import asyncio
+import os
 from asyncio import CancelledError, StreamReader, StreamWriter
+from collections import deque
 from logging import getLogger
-from typing import Literal, NoReturn
+from typing import Iterable, Literal, NoReturn
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from pyseq2.base.instruments_types import SEPARATOR, SerialInstruments
+from pyseq2.com.recorder import Direction, Frame, read_log
 from pyseq2.fakes.fake_handlers import FakeARM9, FakeFPGA, FakeLaser, FakePump, Fakes, FakeValve, FakeX, FakeY
 
 handlers: dict[SerialInstruments, Fakes] = {
@@ -30,6 +33,9 @@ class FakeOptions(BaseModel):
     drop: bool = False
     delay: float = 0
     split_delay: float = 0
+    replay: str | None = None  # Path to a log from `pyseq2.com.recorder`. Replaces the fake handlers.
+    # Responses arrive when the real instrument would send them. See `pyseq2.fakes.fake_handlers`.
+    realistic_timing: bool = Field(default_factory=lambda: os.environ.get("FAKE_HISEQ_TIMING", "0") == "1")
 
 
 class FakeTransport(asyncio.Transport):
@@ -71,15 +77,78 @@ class FakeTransport(asyncio.Transport):
         if self.test_params.drop:
             return
 
-        for i, res in enumerate(self.f(data.strip().decode("ISO-8859-1")).split("\n")):
+        cmd = data.strip().decode("ISO-8859-1")
+        if self.test_params.realistic_timing:
+            lines = self.f.respond(cmd, self.loop.time())
+        else:
+            lines = [(0.0, line) for line in self.f(cmd).split("\n")]
+
+        # Lines due at the same time go out together. Timers with the same deadline are not ordered.
+        chunks: list[tuple[float, bytes]] = []
+        for i, (delay, res) in enumerate(lines):
             res = res.encode("ISO-8859-1") + self.sep
-            if self.test_params.delay or (i > 0 and self.test_params.split_delay):
-                self.loop.call_later(self.test_params.delay, self.q_rcvd.put_nowait, res)
+            delay += self.test_params.delay + (self.test_params.split_delay if i > 0 else 0)
+            if chunks and chunks[-1][0] == delay:
+                chunks[-1] = (delay, chunks[-1][1] + res)
+            else:
+                chunks.append((delay, res))
+
+        for delay, res in chunks:
+            if delay:
+                self.loop.call_later(delay, self.q_rcvd.put_nowait, res)
                 continue
 
             self.q_rcvd.put_nowait(res)
 
 
+class ReplayTransport(asyncio.Transport):
+    """Plays back the responses of one instrument from a recorded session.
+
+    Each recorded Rx line belongs to the latest Tx before it. When the same bytes are written again,
+    the lines are sent back after the same delays as in the recording.
+    Lines received before any Tx are sent on connection with their original offsets.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.StreamReaderProtocol,
+        name: SerialInstruments,
+        frames: Iterable[Frame],
+    ):
+        super().__init__()
+
+        self._name = name
+        self._loop = loop
+        self._protocol = protocol
+        self._exchanges: dict[bytes, deque[list[tuple[float, bytes]]]] = {}
+
+        unsolicited: list[tuple[float, bytes]] = []
+        curr, t_ref = unsolicited, None
+        for f in frames:
+            if f.instrument != name:
+                continue
+            if t_ref is None:
+                t_ref = f.t
+            if f.direction == Direction.TX:
+                curr, t_ref = [], f.t
+                self._exchanges.setdefault(f.data, deque()).append(curr)
+            else:
+                curr.append((f.t - t_ref, f.data))
+
+        loop.call_soon(protocol.connection_made, self)
+        for delay, data in unsolicited:
+            loop.call_later(delay, protocol.data_received, data)
+
+    def write(self, data: bytes):
+        if not (q := self._exchanges.get(data)):
+            logger.warning(f"{self._name}: {data!r} not in recording. Ignored.")
+            return
+
+        for delay, res in q.popleft():
+            self._loop.call_later(delay, self._protocol.data_received, res)
+
+
 async def open_fake(
     url: str,
     name: SerialInstruments,
@@ -89,5 +158,10 @@ async def open_fake(
     loop = asyncio.get_running_loop()
     reader = asyncio.StreamReader(loop=loop)
     protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
-    writer = asyncio.StreamWriter(FakeTransport(loop, protocol, name, test_params), protocol, reader, loop)
+    transport = (
+        ReplayTransport(loop, protocol, name, read_log(test_params.replay))
+        if test_params.replay is not None
+        else FakeTransport(loop, protocol, name, test_params)
+    )
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
     return reader, writer
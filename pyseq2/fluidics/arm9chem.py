@@ -6,7 +6,7 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Callable, Literal, ParamSpec, TypeVar, cast
 
 from pyseq2.base.instruments import UsesSerial
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.log import init_log
 from pyseq2.utils.utils import chkrng, ok_if_match, ok_re, λ_float, λ_int
 
@@ -39,7 +39,7 @@ def parse_chiller(a: str, b: str, c: str) -> tuple[float, float, float]:
 class ARM9Cmd:
     INIT        = CmdParse("INIT", ok_if_match(("A1", "N1")))
     GET_VERSION = CmdParse("?IDN", ok_re(r"Illumina,Bruno Fluidics Controller,0,v2\.[\d+]:A1"))
-    GET_FC_TEMP = CmdParse(λ_float(lambda i: f"?FCTEMP:{i}"), ok_re(r"([\.\d]+)C:A1", float))
+    GET_FC_TEMP = CmdParse(λ_float(lambda i: f"?FCTEMP:{i}"), ok_re(r"([\.\d]+)C:A1", float), priority=Priority.STATUS, ttl=1)
     GET_CHILLER_TEMP = CmdParse(
         "?RETEMP:3",
         ok_re(r"([\d\.]+)C:([\d\.]+)C:([\d\.]+):A1", parse_chiller),
@@ -6,7 +6,7 @@ from contextlib import asynccontextmanager
 from typing import Annotated, AsyncGenerator, Callable, ClassVar, Literal, TypeVar, cast
 
 from pyseq2.base.instruments import UsesSerial
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.log import init_log
 from pyseq2.utils.utils import IS_FAKE, ok_re
 
@@ -61,8 +61,8 @@ class PumpCmd:
     """
 
     INIT = CmdParse("W4R", parser)
-    STATUS = CmdParse("", parser)
-    GET_POS = CmdParse("?", ok_re(r"/0[`@](\d+)", int))
+    STATUS = CmdParse("", parser, priority=Priority.STATUS)
+    GET_POS = CmdParse("?", ok_re(r"/0[`@](\d+)", int), priority=Priority.STATUS, ttl=0.25)
     PULL = CmdParse(check_range("pull"), parser)
     PUSH = CmdParse(check_range("push"), parser)
     STOP = CmdParse("T", parser)
@@ -91,6 +91,7 @@ class Pump(UsesSerial):
     async def wait(self, retries: int = 10) -> None:
         for _ in range(retries):
             if await self.com.send(PumpCmd.STATUS):
+                self.com.invalidate()  # Position may have been cached mid-stroke.
                 return
             else:
                 await asyncio.sleep(0.25)
@@ -147,7 +148,7 @@ class Pump(UsesSerial):
                 case _:
                     raise ValueError("Invalid command.")
 
-        if not IS_FAKE():
+        if not IS_FAKE() or self.com.test_params.realistic_timing:
             # logger.debug("Pump {self.name}: Waiting for pumping to finish.")
             await asyncio.sleep(abs(target - pos) / speed + 0.5)
         await self.wait(retries=retries)
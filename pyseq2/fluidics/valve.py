@@ -8,7 +8,7 @@ from typing import AsyncGenerator, Literal
 
 from pyseq2.base.instruments import Movable, UsesSerial
 from pyseq2.base.instruments_types import ValveName
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.config import CONFIG
 from pyseq2.utils.log import init_log
 from pyseq2.utils.utils import IS_FAKE, ok_re, λ_int
@@ -20,7 +20,7 @@ class ValveCmd:
     ID          = CmdParse("ID", ok_re(r"ID = (.+)", lambda x: x))
     CLEAR_ID    = "*ID*"
     SET_POS     = λ_int(lambda x: f"GO{x}")
-    GET_POS     = CmdParse("CP", ok_re(r"Position is  = (\d+)", int))
+    GET_POS     = CmdParse("CP", ok_re(r"Position is  = (\d+)", int), priority=Priority.STATUS)
     GET_N_PORTS = CmdParse("NP", ok_re(r"NP = (\d+)", int))
 # fmt: on
 
@@ -64,6 +64,7 @@ T = TypeVar("T")
 
 class Imager(metaclass=Singleton):
     UM_PER_PX = 0.375
+    MAX_BUNDLES_IN_RAM = 1500  # Longer scans go to the scratch disk.
 
     @classmethod
     async def ainit(cls, ports: dict[SerialPorts, str], init_cam: bool = True) -> Imager:
@@ -153,9 +154,7 @@ class Imager(metaclass=Singleton):
         This is because all move commands are expected to return some value upon completion.
         """
         logger.info("Waiting for all motions to complete.")
-        await self.x.com.wait()
-        await self.y.com.wait()
-        await self.fpga.com.wait()
+        await asyncio.gather(self.x.com.wait(), self.y.com.wait(), self.fpga.com.wait())
         logger.info("All motions completed.")
 
     async def move(
@@ -197,7 +196,13 @@ class Imager(metaclass=Singleton):
         channels: tuple[int, ...] = (0, 1, 2, 3),
         move_back_to_start: bool = True,
         event_queue: tuple[asyncio.Queue[T], Callable[[int], T]] | None = None,
+        disk: bool | None = None,
     ) -> tuple[UInt16Array, State]:
+        """
+        Args:
+            disk: Capture into memory-mapped files on the scratch disk. See `Cameras.capture`.
+                Defaults to True for scans of at least `MAX_BUNDLES_IN_RAM` bundles if a scratch disk is set.
+        """
         if self.cams is None:
             raise RuntimeError("Camera is not initialized. Initialize Imager with init_cam=True.")
 
@@ -211,8 +216,13 @@ class Imager(metaclass=Singleton):
             raise ValueError("Channels must be between 0 and 3.")
 
         async with self.lock:
-            if not 0 < n_bundles < 1500:
-                raise ValueError("n_bundles should be between 0 and 1500.")
+            if disk is None:
+                disk = n_bundles >= self.MAX_BUNDLES_IN_RAM and self.cams.disk is not None
+            if n_bundles <= 0 or (n_bundles >= self.MAX_BUNDLES_IN_RAM and not disk):
+                raise ValueError(
+                    f"n_bundles should be between 0 and {self.MAX_BUNDLES_IN_RAM}. "
+                    "Longer scans need a scratch disk, see `scratchPath` in the config."
+                )
 
             logger.info(f"Taking an image with {n_bundles} from channel(s) {channels}.")
 
@@ -240,7 +250,11 @@ class Imager(metaclass=Singleton):
 
             await asyncio.gather(self.tdi.prepare_for_imaging(n_px_y, pos), self.y.set_mode("IMAGING"))
             cap = self.cams.capture(
-                n_bundles, fut_capture=self.y.move(end_y_pos, slowly=True), cam=cam, event_queue=event_queue
+                n_bundles,
+                fut_capture=self.y.move(end_y_pos, slowly=True),
+                cam=cam,
+                event_queue=event_queue,
+                disk=disk,
             )
 
             if dark:
@@ -252,9 +266,16 @@ class Imager(metaclass=Singleton):
             logger.info("Done taking an image.")
 
             await self.y.move(pos if move_back_to_start else end_y_pos + 100000)  # Correct for overshoot.
+            idx = c if cam != 1 else [x - 2 for x in c]
+            if disk:  # One channel at a time, straight into another file. Never the whole scan in RAM.
+                out = self.cams._disk().empty((len(idx), imgs.shape[1] - 128, 2048))
+                for i, ch in enumerate(idx):
+                    np.clip(np.flip(imgs[ch], axis=0)[:-128], 0, 4096, out=out[i])
+                return out, state
+
             imgs = np.clip(np.flip(imgs, axis=1), 0, 4096)
             return (
-                imgs[c if cam != 1 else [x - 2 for x in c], :-128, :],
+                imgs[idx, :-128, :],
                 state,
             )  # Remove oversaturated first bundle.
 
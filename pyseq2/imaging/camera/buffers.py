@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Generator
+
+import numpy as np
+import numpy.typing as npt
+
+logger = getLogger(__name__)
+
+UInt16Array = npt.NDArray[np.uint16]
+PAGE = 4096
+
+
+def size_class(nbytes: int, minimum: int = 1 << 20) -> int:
+    """Rounds up to one of four classes per power of two. Wastes at most 25%."""
+    if nbytes <= minimum:
+        return minimum
+    step = 1 << max((nbytes - 1).bit_length() - 3, 0)
+    return -(-nbytes // step) * step
+
+
+class BufferPool:
+    """Reusable image buffers for `_Camera.attach`, grouped by size class.
+
+    A buffer is only handed out again once nothing else refers to it.
+    Images returned from a capture that are still alive are therefore never overwritten.
+    At most `max_bytes` are kept. Requests beyond that get a one-off allocation.
+    """
+
+    def __init__(self, max_bytes: int = 4 << 30) -> None:
+        self.max_bytes = max_bytes
+        self._bufs: dict[int, list[UInt16Array]] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for bucket in self._bufs.values() for b in bucket)
+
+    @staticmethod
+    def _is_free(buf: UInt16Array) -> bool:
+        # References: the pool's list, the caller's loop variable, this argument and getrefcount's own.
+        return sys.getrefcount(buf) <= 4
+
+    def _evict(self, nbytes: int) -> None:
+        """Drops free buffers, largest first, until `nbytes` more fit."""
+        total = self.nbytes
+        for cls in sorted(self._bufs, reverse=True):
+            keep = []
+            for buf in self._bufs[cls]:
+                if total + nbytes > self.max_bytes and self._is_free(buf):
+                    total -= buf.nbytes
+                else:
+                    keep.append(buf)
+            if keep:
+                self._bufs[cls] = keep
+            else:
+                del self._bufs[cls]
+
+    def _get(self, nbytes: int) -> UInt16Array:
+        cls = size_class(nbytes)
+        for buf in self._bufs.get(cls, []):
+            if self._is_free(buf):
+                return buf
+
+        if self.nbytes + cls > self.max_bytes:
+            self._evict(cls)
+        buf = np.zeros(cls // 2, dtype=np.uint16)  # calloc, pages are only faulted in when touched.
+        if self.nbytes + cls <= self.max_bytes:
+            self._bufs.setdefault(cls, []).append(buf)
+        else:
+            logger.warning(f"Buffer pool full at {self.nbytes / 2**30:.2f} GiB. Allocating outside the pool.")
+        return buf
+
+    @contextmanager
+    def lease(self, shape: tuple[int, int]) -> Generator[UInt16Array, None, None]:
+        """Yields a C-contiguous uint16 array of `shape`. Contents are whatever was there before."""
+        n = shape[0] * shape[1]
+        yield self._get(2 * n)[:n].reshape(shape)
+
+    def prefault(self, shape: tuple[int, int], count: int = 1) -> None:
+        """Allocates `count` buffers for `shape` and touches every page so that the first capture
+        does not pay for page faults."""
+        held = []
+        for _ in range(count):
+            buf = self._get(2 * shape[0] * shape[1])
+            buf[:: PAGE // 2] = 0
+            held.append(buf)  # Keeps them busy so that `count` distinct buffers are made.
+        logger.info(f"Pre-faulted {count} buffer(s) for {shape}. Pool holds {self.nbytes / 2**30:.2f} GiB.")
+
+
+class DiskBuffers:
+    """Image buffers backed by `np.memmap` files in `directory`, for captures larger than RAM.
+
+    The OS writes pages out to disk as they fill and reads them back on access.
+    Each file is deleted as soon as it is opened and disappears with the last reference to its array.
+    Use a fast local disk.
+    """
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def empty(self, shape: tuple[int, ...], dtype: npt.DTypeLike = np.uint16) -> np.memmap[Any, Any]:
+        """Zero-filled array on disk."""
+        with tempfile.TemporaryFile(dir=self.directory) as f:
+            return np.memmap(f, dtype=dtype, mode="w+", shape=shape)
+
+    @contextmanager
+    def lease(self, shape: tuple[int, int]) -> Generator[UInt16Array, None, None]:
+        yield self.empty(shape)
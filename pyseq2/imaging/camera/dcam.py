@@ -3,13 +3,14 @@ from __future__ import annotations
 import asyncio
 import pickle  # noqa: S403
 import time
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager, nullcontext
 from ctypes import c_char_p, c_int32, c_uint32, c_void_p, pointer, sizeof
 from enum import IntEnum
 from logging import getLogger
 from pathlib import Path
 from typing import (
     Any,
+    AsyncGenerator,
     Awaitable,
     Callable,
     Coroutine,
@@ -29,8 +30,10 @@ import numpy as np
 import numpy.typing as npt
 
 from . import API, EXECUTOR
+from .buffers import BufferPool, DiskBuffers
 from .dcam_api import DCAMException
 from .dcam_props import DCAMDict
+from pyseq2.config import CONFIG
 from pyseq2.imaging.camera.dcam_api import DCAM_CAPTURE_MODE
 from pyseq2.imaging.camera.dcam_types import Props
 from pyseq2.utils.utils import IS_FAKE
@@ -146,28 +149,32 @@ class _Camera:
             raise DCAMException(f"Invalid status. Got {s.value}.")
 
     @contextmanager
-    def attach(self, n_bundles: int, dim: tuple[int, int]) -> Generator[UInt16Array, None, None]:
+    def attach(
+        self, n_bundles: int, dim: tuple[int, int], pool: BufferPool | DiskBuffers | None = None
+    ) -> Generator[UInt16Array, None, None]:
         """Generates a numpy array and "attach" it to the camera.
         Aka. Tells the camera to write captured bundles here.
 
         Args:
             n_bundles (int): Number of bundles
             height (tuple[int, int]): Dim of each bundle.
+            pool (BufferPool, optional): Take the array from here instead of allocating a new one.
 
         Yields:
             Generator[UInt16Array, None, None]: Output array (n_bundles × height, dim[1])
         """
-        arr: npt.NDArray[np.uint16] = np.zeros((n_bundles * dim[0], dim[1]), dtype=np.uint16)
-        addr, ptr_arr = arr.ctypes.data, (c_void_p * n_bundles)()
-        for i in range(n_bundles):
-            # sizeof(uint16) * width * height
-            ptr_arr[i] = 2 * dim[1] * dim[0] * i + addr
-
-        try:
-            API.dcam_attachbuffer(self.handle, ptr_arr, c_uint32(sizeof(ptr_arr)))
-            yield arr
-        finally:
-            API.dcam_releasebuffer(self.handle)
+        shape = (n_bundles * dim[0], dim[1])
+        with pool.lease(shape) if pool is not None else nullcontext(np.zeros(shape, dtype=np.uint16)) as arr:
+            addr, ptr_arr = arr.ctypes.data, (c_void_p * n_bundles)()
+            for i in range(n_bundles):
+                # sizeof(uint16) * width * height
+                ptr_arr[i] = 2 * dim[1] * dim[0] * i + addr
+
+            try:
+                API.dcam_attachbuffer(self.handle, ptr_arr, c_uint32(sizeof(ptr_arr)))
+                yield arr
+            finally:
+                API.dcam_releasebuffer(self.handle)
 
     @property
     def n_frames_taken(self) -> int:
@@ -198,8 +205,8 @@ class TwoProps(Generic[T, R]):
             p[name] = value
 
     def update(self, to_change: Mapping[T, R]):
-        for k, v in to_change.items():
-            self[k] = v
+        for p in self._props:
+            p.update(to_change)
 
 
 class Cameras:
@@ -231,13 +238,28 @@ class Cameras:
 
         return cls((await _Camera.ainit(0), await _Camera.ainit(1)))
 
-    def __init__(self, _cams: tuple[_Camera, _Camera] | None = None) -> None:
+    def __init__(
+        self,
+        _cams: tuple[_Camera, _Camera] | None = None,
+        pool: BufferPool | None = None,
+        disk: DiskBuffers | None = None,
+    ) -> None:
+        """
+        Args:
+            pool: Reused for the image buffers of every capture. Defaults to a 4 GiB pool.
+                Call `pool.prefault` ahead of time to also skip page faults on the first capture.
+            disk: Buffers for captures with `disk=True`. Defaults to `scratchPath` in the config, if set.
+        """
         if _cams is None:
             logger.info("Initializing DCAM API.")
             API.dcam_init(c_void_p(0), pointer(c_int32(0)), c_char_p(0))
             _cams = (_Camera(0), _Camera(1))
 
         self._cams = _cams
+        self.pool = pool if pool is not None else BufferPool()
+        if disk is None and CONFIG.scratchPath is not None:
+            disk = DiskBuffers(CONFIG.scratchPath)
+        self.disk = disk
 
         self.properties = TwoProps(*[c.properties for c in self._cams])
         self.set_mode(Mode.TDI)
@@ -254,30 +276,36 @@ class Cameras:
     @overload
     @contextmanager
     def _attach(
-        self, n_bundles: int, dim: tuple[int, int], cam: Literal[0, 1] = ...
+        self, n_bundles: int, dim: tuple[int, int], cam: Literal[0, 1] = ..., disk: bool = ...
     ) -> Generator[UInt16Array, None, None]:
         ...
 
     @overload
     @contextmanager
     def _attach(
-        self, n_bundles: int, dim: tuple[int, int], cam: Literal[2] = ...
+        self, n_bundles: int, dim: tuple[int, int], cam: Literal[2] = ..., disk: bool = ...
     ) -> Generator[tuple[UInt16Array, UInt16Array], None, None]:
         ...
 
     @contextmanager
     def _attach(
-        self, n_bundles: int, dim: tuple[int, int], cam: Cam = 2
+        self, n_bundles: int, dim: tuple[int, int], cam: Cam = 2, disk: bool = False
     ) -> Generator[UInt16Array, None, None] | Generator[tuple[UInt16Array, UInt16Array], None, None]:
+        pool = self._disk() if disk else self.pool
         if cam == 2:
-            with self[0].attach(n_bundles, dim) as buf1, self[1].attach(n_bundles, dim) as buf2:
+            with self[0].attach(n_bundles, dim, pool) as buf1, self[1].attach(n_bundles, dim, pool) as buf2:
                 logger.debug(f"Allocated memory for {n_bundles} bundles.")
                 yield (buf1, buf2)
         else:
-            with self[cam].attach(n_bundles, dim) as buf1:
+            with self[cam].attach(n_bundles, dim, pool) as buf1:
                 logger.debug(f"Allocated memory for {n_bundles} bundles for cam {cam}.")
                 yield buf1
 
+    def _disk(self) -> DiskBuffers:
+        if self.disk is None:
+            raise RuntimeError("No scratch disk. Set `scratchPath` in the config or pass `disk` to Cameras.")
+        return self.disk
+
     @property
     def mode(self) -> ModeDict:
         return self._mode
@@ -286,7 +314,47 @@ class Cameras:
         self.properties.update(m)
         self._mode = m
 
-    async def capture(
+    async def _stream(
+        self,
+        n_bundles: int,
+        dim: tuple[int, int],
+        start_attach: Callable[[], Any],
+        fut_capture: Awaitable[Any] | None,
+        mode: ModeDict,
+        cam: Cam,
+        block: int = 1,
+        disk: bool = False,
+    ) -> AsyncGenerator[tuple[int, int, Any], None]:
+        """Yields (start, end, attached buffers) whenever at least `block` more bundles are complete."""
+        if cam == 2 and dim != (128, 4096):
+            raise ValueError("Dim needs to be (128, 4096) when using both cameras.")
+
+        self.set_mode(mode)
+        with self._attach(n_bundles=n_bundles, dim=dim, cam=cam, disk=disk) as bufs, ExitStack() as stack:
+            start_attach()
+            for c in (0, 1) if cam == 2 else (cam,):
+                stack.enter_context(self[c].capture())
+
+            fut = asyncio.create_task(cast(Coroutine[Any, Any, Any], fut_capture)) if fut_capture else None
+            try:
+                done, t0 = 0, time.monotonic()
+                while done < n_bundles:
+                    await asyncio.sleep(0.05)
+                    n = min(self.n_frames_taken(cam), n_bundles)
+                    if n == 0 and time.monotonic() - t0 > 5:
+                        raise Exception(f"Did not capture a single bundle before {5=}s.")
+                    if n - done >= block or (n == n_bundles and n > done):
+                        yield done, n, bufs
+                        done = n
+            except GeneratorExit:  # Consumer stopped early. Let the move finish before going idle.
+                if fut:
+                    await fut
+                raise
+            if fut:
+                await fut
+            logger.info(f"Retrieved all {n_bundles} bundles.")
+
+    async def stream(
         self,
         n_bundles: int,
         dim: tuple[int, int] = (128, 4096),
@@ -294,44 +362,61 @@ class Cameras:
         fut_capture: Awaitable[Any] | None = None,
         mode: ModeDict = Mode.TDI,
         cam: Literal[0, 1, 2] = 2,
-        event_queue: tuple[asyncio.Queue[T], Callable[[int], T]] | None = None,
-    ) -> UInt16Array:
+        block: int = 1,
+        disk: bool = False,
+    ) -> AsyncGenerator[tuple[int, UInt16Array | tuple[UInt16Array, UInt16Array]], None]:
+        """Same as `capture` but yields each block of at least `block` bundles as soon as it is complete.
 
-        if cam == 2 and dim != (128, 4096):
-            raise ValueError("Dim needs to be (128, 4096) when using both cameras.")
+        Yields:
+            Index of the first bundle in the block and views into the attached buffer, no copies.
+            (2, rows, 2048) per camera for full-width captures, (rows, width) otherwise. A tuple if `cam == 2`.
+            Views are only valid until the next capture.
 
-        async def in_ctx():
-            curr = 0
-            fut = asyncio.create_task(cast(Coroutine[Any, Any, Any], fut_capture)) if fut_capture else None
-            t0 = time.monotonic()
-            while (n := self.n_frames_taken(cam)) < n_bundles:
-                await asyncio.sleep(0.05)
-                if n == 0 and time.monotonic() - t0 > 5:
-                    raise Exception(f"Did not capture a single bundle before {5=}s.")
-                # Send every other bundle.
-                if event_queue is not None and n > curr + 2:
-                    event_queue[0].put_nowait(event_queue[1](n + 2))
-                    curr = n
-            if event_queue is not None:
-                await asyncio.sleep(0.05)
-                event_queue[0].put_nowait(event_queue[1](n_bundles))
-            if fut:
-                await fut
+        Wrap in `contextlib.aclosing` when breaking out early so that the cameras are released right away.
+        """
 
-        self.set_mode(mode)
-        with self._attach(n_bundles=n_bundles, dim=dim, cam=cam) as bufs:
-            start_attach()
+        def view(buf: UInt16Array, start: int, end: int) -> UInt16Array:
+            v = buf[start * dim[0] : end * dim[0]]
+            return v.reshape(-1, 2, 2048).transpose(1, 0, 2) if dim[1] == 4096 else v
+
+        async for start, end, bufs in self._stream(
+            n_bundles, dim, start_attach, fut_capture, mode, cam, block, disk
+        ):
             if cam == 2:
-                with self[0].capture(), self[1].capture():
-                    await in_ctx()
+                yield start, (view(bufs[0], start, end), view(bufs[1], start, end))
             else:
-                with self[cam].capture():
-                    await in_ctx()
-            logger.info(f"Retrieved all {n_bundles} bundles.")
+                yield start, view(bufs, start, end)
+
+    async def capture(
+        self,
+        n_bundles: int,
+        dim: tuple[int, int] = (128, 4096),
+        start_attach: Callable[[], Any] = lambda: None,
+        fut_capture: Awaitable[Any] | None = None,
+        mode: ModeDict = Mode.TDI,
+        cam: Literal[0, 1, 2] = 2,
+        event_queue: tuple[asyncio.Queue[T], Callable[[int], T]] | None = None,
+        disk: bool = False,
+    ) -> UInt16Array:
+        """Captures `n_bundles` bundles.
+
+        With `disk=True`, buffers and output are memory-mapped files on the scratch disk instead of RAM.
+        Use this for scans that do not fit in memory.
+        """
+        curr = 0
+        async for _, n, bufs in self._stream(n_bundles, dim, start_attach, fut_capture, mode, cam, disk=disk):
+            # Send every other bundle.
+            if event_queue is not None and curr + 2 < n < n_bundles:
+                event_queue[0].put_nowait(event_queue[1](n + 2))
+                curr = n
+        if event_queue is not None:
+            await asyncio.sleep(0.05)
+            event_queue[0].put_nowait(event_queue[1](n_bundles))
 
         if cam == 2:
             bufs = cast(tuple[UInt16Array, UInt16Array], bufs)
-            return np.hstack(bufs).reshape(-1, 4, 2048).transpose(1, 0, 2)
+            out = self._disk().empty((bufs[0].shape[0], 8192)) if disk else None
+            return np.concatenate(bufs, axis=1, out=out).reshape(-1, 4, 2048).transpose(1, 0, 2)
 
         bufs = cast(UInt16Array, bufs)
         return bufs.reshape(-1, 2, 2048).transpose(1, 0, 2) if dim[1] == 4096 else bufs
@@ -1,7 +1,7 @@
 from logging import getLogger
 
 from pyseq2.base.instruments import FPGAControlled
-from pyseq2.com.async_com import CmdParse
+from pyseq2.com.async_com import CmdParse, Priority
 from pyseq2.utils.utils import ok_if_match, ok_re, λ_int
 
 logger = getLogger(__name__)
@@ -12,8 +12,8 @@ Y_OFFSET = int(7e6)
 
 class TDICmd:
     # fmt: off
-    GET_ENCODER_Y = CmdParse(                    "TDIYERD"                               , ok_re(r"TDIYERD (\d+)", lambda x: int(x) - Y_OFFSET))
-    N_PULSES      = CmdParse(                    "TDIPULSES"                             , ok_re(r"TDIPULSES (\d+)", lambda x: int(x) - 1))
+    GET_ENCODER_Y = CmdParse(                    "TDIYERD"                               , ok_re(r"TDIYERD (\d+)", lambda x: int(x) - Y_OFFSET), priority=Priority.STATUS)
+    N_PULSES      = CmdParse(                    "TDIPULSES"                             , ok_re(r"TDIPULSES (\d+)", lambda x: int(x) - 1), priority=Priority.STATUS)
 
     SET_ENCODER_Y = CmdParse(λ_int(lambda x:    f"TDIYEWR {x + Y_OFFSET}")               , ok_if_match("TDIYEWR"))
     SET_TRIGGER   = CmdParse(λ_int(lambda x:    f"TDIYPOS {x + Y_OFFSET - 80000}")       , ok_if_match("TDIYPOS"))
@@ -4,7 +4,7 @@ from logging import getLogger
 from typing import AsyncGenerator, Awaitable
 
 from pyseq2.base.instruments import FPGAControlled, Movable
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.utils import chkrng, ok_if_match, ok_re, λ_float, λ_int
 
 logger = getLogger(__name__)
@@ -17,8 +17,8 @@ RANGE = (0, 65535)
 class ObjCmd:
     # fmt: off
     # Callable[[Annotated[int, "mm/s"]], str]
-    GET_TARGET_POS = CmdParse(     "ZDACR"              , ok_re(r"^ZDACR (\d+)$", int))  # D A
-    GET_POS        = CmdParse(     "ZADCR"              , ok_re(r"^ZADCR (\d+)$", int))  # A D
+    GET_TARGET_POS = CmdParse(     "ZDACR"              , ok_re(r"^ZDACR (\d+)$", int), priority=Priority.STATUS)  # D A
+    GET_POS        = CmdParse(     "ZADCR"              , ok_re(r"^ZADCR (\d+)$", int), priority=Priority.STATUS, ttl=0.25)  # A D
 
     SET_VELO = CmdParse(λ_float(lambda x: f"ZSTEP {int(1288471 * x)}"), ok_if_match("ZSTEP"))
     SET_POS  = CmdParse(chkrng(λ_int(lambda x: f"ZDACW {x}"), *RANGE), ok_if_match("ZDACW"))
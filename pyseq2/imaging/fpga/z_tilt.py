@@ -5,7 +5,7 @@ from logging import getLogger
 from typing import Any, Callable, Iterable, Literal, TypeVar, cast
 
 from pyseq2.base.instruments import FPGAControlled
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.log import init_log
 from pyseq2.utils.utils import chkrng, ok_re, λ_int
 
@@ -17,7 +17,7 @@ RANGE = (0, 25000)
 
 # fmt: off
 class TiltCmd:
-    READ_POS = CmdParse(λ_int(       lambda i   : f"T{i}RD")                 , ok_re(r"^T[123]RD (\-?\d+)$", int))
+    READ_POS = CmdParse(λ_int(       lambda i   : f"T{i}RD")                 , ok_re(r"^T[123]RD (\-?\d+)$", int), priority=Priority.STATUS, ttl=0.25)
     GO_HOME  = CmdParse(λ_int(       lambda i   : f"T{i}HM")                 , None, ok_re(r"@TILTPOS[123] \-?\d+\nT[123]HM"), n_lines=2)
     CLEAR_REGISTER = CmdParse(λ_int( lambda i   : f"T{i}CR"),         ok_re(r"^T[123]CR$"))
     SET_POS  = CmdParse(λ_int(chkrng(lambda i, x: f"T{i}MOVETO {x}", *RANGE)), None, ok_re(r"^T[123]MOVETO \d+$"))
@@ -7,7 +7,7 @@ from typing import Annotated, Iterator, Literal, cast
 
 from pyseq2.base.instruments import UsesSerial
 from pyseq2.base.instruments_types import SerialInstruments
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.utils import chkrng, ok_if_match, λ_int
 
 logger = getLogger(__name__)
@@ -35,8 +35,8 @@ class LaserCmd:
     ON = "ON"
     OFF = "OFF"
     SET_POWER  = λ_int(chkrng(lambda x: f"POWER={x}", *POWER_RANGE))
-    GET_POWER  = CmdParse("POWER?"  , v_get_power)
-    GET_STATUS = CmdParse("STAT?"   , v_get_status)
+    GET_POWER  = CmdParse("POWER?"  , v_get_power, priority=Priority.STATUS, ttl=1)
+    GET_STATUS = CmdParse("STAT?"   , v_get_status, priority=Priority.STATUS, ttl=1)
     VERSION    = CmdParse("VERSION?", ok_if_match(("SMD-G-1.1.2", "SMD-G-1.1.1", "SMD12/6H-3.1.0")))
     # fmt: on
 
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Any, Callable, Literal
 
 from pyseq2.base.instruments import Movable, UsesSerial
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority
 from pyseq2.utils.log import init_log
 from pyseq2.utils.utils import chkrng, ok_if_match, ok_re, λ_float, λ_int, λ_str
 
@@ -71,9 +71,9 @@ class YCmd:
 
     # fmt: off
     SET_POS    = CmdParse(λ_int(chkrng(lambda x: f"D{x}", *RANGE)), ok_re(r"1D\-?\d+"))
-    GET_POS    = CmdParse("R(PA)"                         , gen_reader(r"R\(PA\)"), n_lines=2)  # Report(Position Actual)
-    IS_MOVING  = CmdParse("R(MV)"                         , lambda x: bool(gen_reader(r"R\(MV\)")(x)), n_lines=2)
-    TARGET_POS = CmdParse("R(PT)",                          gen_reader(r"R\(PT\)")    , n_lines=2)
+    GET_POS    = CmdParse("R(PA)"                         , gen_reader(r"R\(PA\)"), n_lines=2, priority=Priority.STATUS, ttl=0.25)  # Report(Position Actual)
+    IS_MOVING  = CmdParse("R(MV)"                         , lambda x: bool(gen_reader(r"R\(MV\)")(x)), n_lines=2, priority=Priority.STATUS)
+    TARGET_POS = CmdParse("R(PT)",                          gen_reader(r"R\(PT\)")    , n_lines=2, priority=Priority.STATUS)
 
     RETURN_WHEN_MOVE_DONE  = CmdParse("GOTO(CHKMV)"       , ok_if_match("1GOTO(CHKMV)"), delayed_parser=ok_if_match("Move Done"), timeout=60)  # Returns when move is completed.
     GAINS      = CmdParse(λ_str  (lambda x: f"GAINS({x})"), ok_re(r"GAINS\(([\d\.,]+)\)"))
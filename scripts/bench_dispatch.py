@@ -0,0 +1,79 @@
+"""Floods a fake FPGA with mixed commands to measure response routing in COM._read_forever.
+Run with and without the dispatch index to compare.
+
+A number of commands that never get a response are kept pending throughout,
+standing in for moves that only return on completion.
+"""
+import asyncio
+import logging
+import time
+from random import Random
+
+from rich.logging import RichHandler
+
+from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.fakes.fake_serial import FakeOptions
+from pyseq2.imaging.fpga.optics import OpticCmd
+from pyseq2.imaging.fpga.tdi import TDICmd
+from pyseq2.imaging.fpga.z_obj import ObjCmd
+from pyseq2.imaging.fpga.z_tilt import TiltCmd
+
+logging.basicConfig(
+    level="WARNING",
+    format="[yellow]%(name)-10s[/] %(message)s",
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True, markup=True)],
+)
+
+N_CMDS = 10_000
+N_PENDING = 200
+
+
+def gen_cmds(n: int, seed: int = 0) -> list[CmdParse]:
+    rand = Random(seed)
+    pool = (
+        lambda: TiltCmd.READ_POS(rand.choice((1, 2, 3))),
+        lambda: TiltCmd.SET_VELO(rand.choice((1, 2, 3)), 62500),
+        lambda: ObjCmd.GET_POS,
+        lambda: ObjCmd.GET_TARGET_POS,
+        lambda: ObjCmd.SET_POS(rand.randint(0, 65535)),
+        lambda: TDICmd.GET_ENCODER_Y,
+        lambda: TDICmd.SET_ENCODER_Y(rand.randint(0, 100000)),
+        lambda: TDICmd.ARM_TRIGGER(rand.randint(128, 4096), rand.randint(0, 100000)),
+        lambda: OpticCmd.SET_OD(143, rand.choice((1, 2))),
+        lambda: OpticCmd.OPEN_SHUTTER,
+    )
+    return [rand.choice(pool)() for _ in range(n)]
+
+
+async def bench(indexed: bool) -> float:
+    opts = FakeOptions(drop=True)
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=opts)
+    if not indexed:
+        com.dispatch_key = None
+
+    home = CmdParse("T1HM", None, TiltCmd.GO_HOME.delayed_parser, n_lines=2, timeout=None)
+    pending = [asyncio.create_task(com.send(home)) for _ in range(N_PENDING)]
+    while len(com._waiting) < N_PENDING:
+        await asyncio.sleep(0)
+    opts.drop = False
+
+    cmds = gen_cmds(N_CMDS)
+    t0 = time.perf_counter()
+    await asyncio.gather(*[com.send(c) for c in cmds])
+    t = time.perf_counter() - t0
+
+    [p.cancel() for p in pending]
+    return t
+
+
+async def main() -> None:
+    for indexed in (False, True):
+        t = await bench(indexed)
+        print(
+            f"{'Indexed' if indexed else 'Linear ':7s}: {N_CMDS} commands in {t:.2f} s ({N_CMDS / t:.0f} cmd/s)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
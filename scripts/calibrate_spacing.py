@@ -0,0 +1,73 @@
+"""Finds the smallest safe spacing between commands for each instrument and saves it as the
+profile that `COM.ainit` loads. Runs against the fakes when FAKE_HISEQ=1.
+
+Only reads and writes of default settings are sent, but instruments should be idle.
+"""
+import asyncio
+import logging
+from typing import Any
+
+from rich.logging import RichHandler
+
+from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.spacing import PROFILE_PATH, SpacingProfile, calibrate
+from pyseq2.fluidics.arm9chem import ARM9Cmd
+from pyseq2.fluidics.pump import PumpCmd
+from pyseq2.fluidics.valve import ValveCmd
+from pyseq2.imaging.fpga.tdi import TDICmd
+from pyseq2.imaging.fpga.z_obj import ObjCmd
+from pyseq2.imaging.fpga.z_tilt import TiltCmd
+from pyseq2.imaging.laser import LaserCmd
+from pyseq2.imaging.xstage import XCmd
+from pyseq2.imaging.ystage import YCmd
+from pyseq2.utils.ports import get_ports
+
+logging.basicConfig(
+    level="INFO",
+    format="[yellow]%(name)-10s[/] %(message)s",
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True, markup=True)],
+)
+
+PROBES: dict[str, list[CmdParse[Any, Any]]] = {
+    "x": [XCmd.GET_POS, XCmd.IS_MOVING],
+    "y": [YCmd.GET_POS, YCmd.IS_MOVING],
+    "fpga": [
+        TDICmd.GET_ENCODER_Y,
+        TDICmd.N_PULSES,
+        ObjCmd.GET_POS,
+        ObjCmd.SET_VELO(5),
+        TiltCmd.READ_POS(1),
+        TiltCmd.SET_VELO(1, 62500),
+    ],
+    "laser_g": [LaserCmd.GET_POWER, LaserCmd.GET_STATUS],
+    "laser_r": [LaserCmd.GET_POWER, LaserCmd.GET_STATUS],
+    "arm9chem": [ARM9Cmd.GET_FC_TEMP(0)],
+    "pumpa": [PumpCmd.GET_POS, PumpCmd.STATUS],
+    "pumpb": [PumpCmd.GET_POS, PumpCmd.STATUS],
+    "valve_a1": [ValveCmd.GET_POS],
+    "valve_a2": [ValveCmd.GET_POS],
+    "valve_b1": [ValveCmd.GET_POS],
+    "valve_b2": [ValveCmd.GET_POS],
+}
+
+
+async def main() -> None:
+    ports = await get_ports()
+    profile = SpacingProfile.load()
+    empty = SpacingProfile()  # Start from the hard-coded spacing, not a previous calibration.
+    for name, cmds in PROBES.items():
+        if name == "fpga":
+            com = await COM.ainit("fpga", ports["fpgacmd"], ports["fpgaresp"], spacing=empty)
+        else:
+            com = await COM.ainit(name, ports[name], spacing=empty)  # type: ignore
+        profile.instruments[name] = await calibrate(com, cmds)
+
+    profile.save()
+    print(f"Saved to {PROFILE_PATH}.")
+    for name, s in profile.instruments.items():
+        print(f"{name:10s} default {s.default}  {s.commands}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
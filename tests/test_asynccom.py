@@ -1,11 +1,22 @@
 import asyncio
+import threading
+import time
+from dataclasses import replace
 from logging import getLogger
+from pathlib import Path
 
 import pytest
 
-from pyseq2.com.async_com import COM, CmdParse
+from pyseq2.com.async_com import COM, CmdParse, Priority, PriorityLock
+from pyseq2.com.latency import LATENCY, Histogram
+from pyseq2.com.recorder import RECORDER, Direction, read_log
+from pyseq2.com.spacing import InstrumentSpacing, SpacingProfile, calibrate
+from pyseq2.fakes.fake_handlers import FakePump, FakeX
 from pyseq2.fakes.fake_serial import FakeOptions, open_fake
-from pyseq2.utils.utils import ok_if_match
+from pyseq2.imaging.fpga.optics import OpticCmd
+from pyseq2.imaging.fpga.z_obj import ObjCmd
+from pyseq2.imaging.fpga.z_tilt import TiltCmd
+from pyseq2.utils.utils import ok_if_match, ok_re
 
 logger = getLogger(__name__)
 
@@ -55,3 +66,176 @@ async def test_gibberish():
     await asyncio.create_task(com.send(CmdParse("OK", ok_if_match("1OK"), timeout=1)))
     with pytest.raises(asyncio.TimeoutError):
         await task
+
+
+async def test_dispatch_index():
+    # Interleaved commands on the FPGA should each get their own response back.
+    com = await COM.ainit("fpga", "COMX", min_spacing=0)
+    cmds = [
+        CmdParse(f"T{i % 3 + 1}RD", ok_re(r"^T([123])RD \-?\d+$", int))
+        if i % 2
+        else CmdParse("ZADCR", ok_re(r"^(ZADCR) \d+$", str))
+        for i in range(100)
+    ]
+    res = await asyncio.gather(*[com.send(c) for c in cmds])
+    assert res == [i % 3 + 1 if i % 2 else "ZADCR" for i in range(100)]
+    assert not com._waiting and not com._index
+
+
+async def test_latency():
+    com = await COM.ainit("fpga", "COMX", min_spacing=0)
+    LATENCY.enabled = True
+    try:
+        await asyncio.gather(
+            *[com.send(TiltCmd.READ_POS(i)) for i in (1, 2, 3)], com.send(OpticCmd.OPEN_SHUTTER)
+        )
+    finally:
+        LATENCY.enabled = False
+
+    snap = LATENCY.snapshot()["fpga"]
+    assert snap["TiltCmd.READ_POS"]["parse"].count == 3
+    assert snap["OpticCmd.OPEN_SHUTTER"]["first_byte"].count == 1
+    s = snap["TiltCmd.READ_POS"]
+    assert s["write"].max <= s["first_byte"].min <= s["first_byte"].max <= s["parse"].max
+    LATENCY.reset()
+
+
+def test_histogram():
+    h = Histogram()
+    for t in range(1, 100001):
+        h.record(t * 1e-5)  # 10 μs to 1 s
+    for q in (50, 90, 99):
+        assert abs(h.percentile(q) - q / 100) / (q / 100) < 2 ** -(Histogram.SUB_BITS - 1)
+    assert h.summary().count == 100000
+
+
+async def test_wait():
+    f = FakeOptions()
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=f)
+    await asyncio.wait_for(com.wait(), 0.01)  # Nothing pending.
+
+    f.delay = 0.3
+    task = asyncio.create_task(com.send(CmdParse("EM2I", ok_if_match("EM2I"))))
+    await asyncio.sleep(0.05)
+    waiter = asyncio.create_task(com.wait())
+    await asyncio.sleep(0.1)
+    assert not waiter.done()
+    await asyncio.wait_for(waiter, 0.5)
+    assert await task
+
+
+async def test_record_replay(tmp_path: Path):
+    path = tmp_path / "session.bin"
+    cmds = [TiltCmd.READ_POS(1), ObjCmd.GET_POS, OpticCmd.OPEN_SHUTTER]
+
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=FakeOptions(delay=0.2))
+    with RECORDER.session(path):
+        expected = await asyncio.gather(*[com.send(c) for c in cmds])
+
+    frames = list(read_log(path))
+    assert [f.direction for f in frames].count(Direction.TX) == len(cmds)
+    assert all(f.instrument == "fpga" for f in frames)
+
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=FakeOptions(replay=path.as_posix()))
+    t0 = time.monotonic()
+    assert await asyncio.gather(*[com.send(c) for c in cmds]) == expected
+    assert time.monotonic() - t0 > 0.15  # Original timing.
+
+
+async def test_realistic_timing():
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=FakeOptions(realistic_timing=True))
+    await com.send(ObjCmd.SET_VELO(0.1))  # 26200 steps/s
+    await com.send(ObjCmd.SET_POS(0))
+
+    t0 = time.monotonic()
+    assert await com.send(ObjCmd.SET_POS(5240))
+    assert 0.15 < time.monotonic() - t0 < 0.4
+    t0 = time.monotonic()
+    assert await com.send(ObjCmd.SET_POS(5240))  # Already there.
+    assert time.monotonic() - t0 < 0.1
+
+    pump = FakePump()
+    assert pump.respond("/1V400IA200R", 0.0) == [(0.0, "/0`")]
+    assert pump.respond("/1", 0.4) == [(0.0, "/0@")]
+    assert pump.respond("/1", 0.6) == [(0.0, "/0`")]
+
+    x = FakeX()  # Trapezoid: 6144 steps/s, 4000 steps/s²
+    (_, _), (t_done, done) = x.respond("MA 30000,1", 0.0)
+    assert done == "?!" and t_done == pytest.approx(30000 / 6144 + 6144 / 4000)
+
+
+async def test_priority_lock():
+    lock, order = PriorityLock(), []
+
+    async def worker(name: str, priority: Priority):
+        async with lock(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await lock.acquire()
+    tasks = [
+        asyncio.create_task(worker(name, p))
+        for name, p in [
+            ("s1", Priority.STATUS),
+            ("c1", Priority.CONTROL),
+            ("s2", Priority.STATUS),
+            ("c2", Priority.CONTROL),
+        ]
+    ]
+    cancelled = asyncio.create_task(worker("x", Priority.CONTROL))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    lock.release()
+    await asyncio.gather(*tasks)
+    assert order == ["c1", "c2", "s1", "s2"]
+    assert not lock.locked()
+
+
+async def test_cache():
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=FakeOptions(delay=0.1))
+    tasks = [asyncio.create_task(com.send(ObjCmd.GET_POS)) for _ in range(10)]
+    await asyncio.sleep(0.05)
+    assert len(com._waiting) == 1  # Single flight.
+    assert len(set(await asyncio.gather(*tasks))) == 1
+
+    t0 = time.monotonic()
+    await com.send(ObjCmd.GET_POS)
+    assert time.monotonic() - t0 < 0.05  # Cached.
+
+    await com.send(ObjCmd.SET_POS(0))
+    assert not com._cache
+    t0 = time.monotonic()
+    await com.send(ObjCmd.GET_POS)
+    assert time.monotonic() - t0 > 0.05
+
+
+async def test_io_thread():
+    com = await COM.ainit("fpga", "COMX", min_spacing=0, test_params=FakeOptions(delay=0.1), io_thread=True)
+    assert com._thread is not threading.current_thread()
+    assert await asyncio.gather(*[com.send(TiltCmd.READ_POS(i)) for i in (1, 2, 3)]) == [0, 0, 0]
+
+    task = asyncio.create_task(com.send(OpticCmd.OPEN_SHUTTER))
+    await asyncio.sleep(0.02)
+    time.sleep(0.3)  # Blocks the main loop but not the I/O thread.
+    assert not com._waiting
+    assert await task
+    await asyncio.wait_for(com.wait(), 0.1)
+
+
+async def test_spacing(tmp_path: Path):
+    path = tmp_path / "spacing.json"
+    SpacingProfile(instruments={"fpga": InstrumentSpacing(default=0, commands={"ObjCmd.GET_POS": 0.1})}).save(
+        path
+    )
+    com = await COM.ainit("fpga", "COMX", min_spacing=0.05, spacing=SpacingProfile.load(path))
+    assert com.min_spacing == 0
+
+    t0 = time.monotonic()
+    await asyncio.gather(*[com.send(ObjCmd.GET_TARGET_POS) for _ in range(5)])
+    assert time.monotonic() - t0 < 0.05
+    t0 = time.monotonic()
+    await asyncio.gather(*[com.send(replace(ObjCmd.GET_POS, ttl=None)) for _ in range(3)])
+    assert time.monotonic() - t0 > 0.2
+
+    res = await calibrate(com, [TiltCmd.SET_VELO(1, 62500)], (0.01, 0), n=5)
+    assert res.commands == {"TiltCmd.SET_VELO": 0} and res.default == 0
@@ -1,23 +1,87 @@
-from ctypes import c_void_p
-
-import pytest
-
-from pyseq2.imaging.camera.dcam import API, TwoProps
-from pyseq2.imaging.camera.dcam_api import DCAMException
-
-
-def test_two_props():
-    a, b = {"same": 1, "diff": 0}, {"same": 1, "diff": 1}
-    t = TwoProps(a, b)
-    with pytest.raises(Exception):
-        t["diff"]
-    t.update({"diff": 1})
-    t["diff"]
-    t["same"] = -1
-    assert t["same"] == -1
-
-
-def test_error():
-    handle = c_void_p(0)
-    with pytest.raises(DCAMException, match="Error code: 5."):
-        API.dcam_unlockbits(handle)  # Proxy for return 1.
+from ctypes import c_void_p
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pyseq2.imaging.camera.buffers import BufferPool, DiskBuffers, size_class
+from pyseq2.imaging.camera.dcam import API, Cameras, Mode, TwoProps
+from pyseq2.imaging.camera.dcam_api import DCAMException
+
+
+def test_two_props():
+    a, b = {"same": 1, "diff": 0}, {"same": 1, "diff": 1}
+    t = TwoProps(a, b)
+    with pytest.raises(Exception):
+        t["diff"]
+    t.update({"diff": 1})
+    t["diff"]
+    t["same"] = -1
+    assert t["same"] == -1
+
+
+def test_set_mode_diff(monkeypatch: pytest.MonkeyPatch):
+    cams = Cameras()
+    written: list[int] = []
+    setget = API.dcam_setgetpropertyvalue
+    monkeypatch.setattr(
+        API, "dcam_setgetpropertyvalue", lambda *args: written.append(args[1].value) or setget(*args)
+    )
+
+    cams.set_mode(Mode.TDI)
+    assert not written  # Already applied in __init__.
+
+    cams.set_mode(Mode.FOCUS_SWEEP)
+    assert 0 < len(written) <= 2 * len(Mode.FOCUS_SWEEP)
+    assert cams[0].properties["partial_area_vsize"] == 64
+
+    written.clear()
+    cams.set_mode(Mode.TDI)
+    cams.set_mode(Mode.TDI)
+    assert len(written) == 2 * len(Mode.TDI)
+    assert cams.properties["sensor_mode"] == 4
+
+
+def test_error():
+    handle = c_void_p(0)
+    with pytest.raises(DCAMException, match="Error code: 5."):
+        API.dcam_unlockbits(handle)  # Proxy for return 1.
+
+
+def test_size_class():
+    assert size_class(1) == 1 << 20
+    for n in (3 << 20, 1500 * 128 * 4096 * 2, 12345678):
+        assert n <= size_class(n) <= 1.25 * n
+
+
+def test_pool():
+    pool = BufferPool(max_bytes=8 << 20)
+    with pool.lease((128, 4096)) as a:
+        addr = a.ctypes.data
+    del a
+    with pool.lease((100, 4096)) as b:  # Same class, reused.
+        assert b.ctypes.data == addr
+        with pool.lease((128, 4096)) as c:  # First one is busy.
+            assert c.ctypes.data != addr
+    del b, c
+    assert pool.nbytes == 2 << 20
+
+    with pool.lease((128, 4096)) as d:
+        kept = d[:10]  # A live view keeps the buffer out of circulation.
+    with pool.lease((128, 4096)) as e:
+        assert not np.shares_memory(kept, e)
+    del d, e
+
+    with pool.lease((1024, 4096)) as big:  # 8 MiB, evicts the free small ones.
+        assert pool.nbytes <= pool.max_bytes
+    del big, kept
+    pool.prefault((128, 4096), count=2)
+    assert pool.nbytes <= pool.max_bytes
+
+
+def test_disk_buffers(tmp_path: Path):
+    disk = DiskBuffers(tmp_path / "scratch")
+    with disk.lease((256, 4096)) as arr:
+        assert isinstance(arr, np.memmap) and arr.shape == (256, 4096) and not arr.any()
+        arr[:] = 7
+    assert arr.sum() == 7 * 256 * 4096  # Still mapped after the lease.
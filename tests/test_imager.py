@@ -1,9 +1,12 @@
-from contextlib import nullcontext
+from contextlib import aclosing, nullcontext
+from pathlib import Path
 
+import numpy as np
 import pytest
 import pytest_asyncio
 
 from pyseq2.imager import Imager
+from pyseq2.imaging.camera.buffers import DiskBuffers
 from pyseq2.utils.ports import get_ports
 
 
@@ -26,6 +29,42 @@ async def test_take(imager: Imager, c: int):
         await imager.save("test.tif", img)
 
 
+async def test_stream(imager: Imager):
+    assert imager.cams is not None
+    got = 0
+    async for start, (a, b) in imager.cams.stream(16, block=4):
+        assert start == got
+        assert a.shape[0] == 2 and a.shape[2] == 2048 and a.shape == b.shape
+        assert a.base is not None  # View
+        got += a.shape[1] // 128
+    assert got == 16
+
+    async with aclosing(imager.cams.stream(16, cam=0, block=4)) as stream:
+        async for _ in stream:
+            break  # Stopping early releases the cameras.
+    assert (await imager.cams.capture(4, cam=0)).shape == (2, 4 * 128, 2048)
+
+    await imager.cams.capture(16)
+    held = imager.cams.pool.nbytes
+    for _ in range(3):
+        await imager.cams.capture(16)
+    assert imager.cams.pool.nbytes == held  # Reused, nothing new allocated.
+
+
+async def test_take_disk(imager: Imager, tmp_path: Path):
+    assert imager.cams is not None
+    with pytest.raises(ValueError, match="scratch disk"):
+        await imager.take(imager.MAX_BUNDLES_IN_RAM, channels=(0,))
+
+    imager.cams.disk = DiskBuffers(tmp_path)
+    try:
+        img, _ = await imager.take(2, channels=(0, 2), disk=True)
+    finally:
+        imager.cams.disk = None
+    assert isinstance(img, np.memmap)
+    assert img.shape == (2, 2 * 128, 2048) and img.max() <= 4096
+
+
 async def test_move(imager: Imager):
     await imager.move(
         x=10000,